@@ -12,6 +12,7 @@ of any kind. See LICENSE for the full disclaimer.
 """
 
 from flask import Flask, render_template, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_socketio import SocketIO, emit
 import psutil
 import time
@@ -21,12 +22,38 @@ import re
 import os
 from urllib.parse import unquote
 from collections import deque
+import heapq
+import bisect
+import itertools
+import operator
+from array import array
 from pathlib import Path
 import subprocess
 import shlex
+import signal
 import sqlite3
 import json
 import sys
+import traceback
+import atexit
+import contextvars
+import functools
+import hashlib
+import ctypes
+import ctypes.util
+import struct
+import logging
+import logging.handlers
+import queue
+from eventlet.hubs import trampoline
+from eventlet import tpool
+
+# Optional: orjson serializes the API responses and Socket.IO payloads several
+# times faster than the stdlib json module, which is used when it is missing.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Ensure operational logs (print) reach the systemd journal in real time.
 # Without this, Python block-buffers stdout when stdout is not a TTY, so startup
@@ -53,6 +80,18 @@ SECRET_KEY = 'your-secret-key-change-this'
 # Path to the SQLite database file (will be created if it does not exist)
 DB_PATH = '/opt/monitoring/monitoring.db'
 
+# Parsed requests and system metrics are buffered in memory and written in
+# one transaction per flush instead of one commit per row.
+# How often buffered rows are flushed to the database (in seconds)
+DB_FLUSH_INTERVAL = 1
+
+# Flush immediately once this many rows are waiting (bounds buffer memory)
+DB_FLUSH_MAX_ROWS = 5000
+
+# OS threads that run the heavier API queries off the event loop. Each one
+# keeps its own database connection (and page cache), so keep this small.
+DB_QUERY_THREADS = 4
+
 # -- Data Retention ----------------------------------------------------------
 # How long to keep request data in the database (in days)
 REQUEST_RETENTION_DAYS = 180
@@ -60,11 +99,14 @@ REQUEST_RETENTION_DAYS = 180
 # How long to keep system metrics in the database (in days)
 SYSTEM_METRICS_RETENTION_DAYS = 30
 
+# Rows deleted per transaction by the retention cleanup
+CLEANUP_BATCH_SIZE = 10000
+
 # -- Debug Logging -----------------------------------------------------------
 # Path to the debug log file, or None to disable.
 # WARNING: when enabled this writes one line per parsed log line — very high
-# volume (multiple GB/day) and unrotated. Keep it None in production; set a path
-# only for short, supervised debugging sessions. Operational status (startup,
+# volume. The file is rotated at 64 MB with 3 backups, but keep it None in
+# production; set a path only for short, supervised debugging sessions. Operational status (startup,
 # log-tail start, rotations, errors) always goes to stdout -> the journal.
 DEBUG_LOG = None
 
@@ -115,6 +157,11 @@ EDIT_USER_CORRELATION_WINDOW = 90
 # Maximum number of response-time entries kept in memory per pool
 RESPONSE_TIMES_MAXLEN = 10000
 
+# How long response times are kept in memory (in seconds), i.e. the longer of
+# the two live windows. Only the live 10/30 minute stats are computed from
+# memory; 1h/24h come from the database.
+RESPONSE_TIMES_WINDOW = 1800
+
 # Maximum number of recent error/warning entries kept per pool
 RECENT_ISSUES_MAXLEN = 20
 
@@ -131,6 +178,12 @@ METRICS_PUSH_INTERVAL = 2
 # How often aggregated log stats are pushed to clients (in seconds)
 STATS_PUSH_INTERVAL = 5
 
+# How often the list of watched server processes is rebuilt (in seconds)
+PROCESS_REFRESH_INTERVAL = 30
+
+# How often completed hours of system metrics are rolled up (in seconds)
+ROLLUP_INTERVAL = 3600
+
 # How often the cleanup job runs (in seconds, default 24 hours)
 CLEANUP_INTERVAL = 86400
 
@@ -150,27 +203,74 @@ SERVICE_UNITS['php-fpm'] = PHP_FPM_SERVICE_UNIT
 LOG_FILES_FALLBACK = {name: cfg['log_file'] for name, cfg in QGIS_POOLS.items()}
 LOG_FILES_FALLBACK['php-fpm'] = PHP_FPM_LOG_FILE
 
-def debug_log(message):
-    """Write debug message to file"""
-    if not DEBUG_LOG:
+# Debug lines are handed to a QueueListener thread that owns the log file, so
+# the parser greenlets never block on disk writes.
+debug_logger = logging.getLogger('qgis-monitor.debug')
+debug_logger.propagate = False
+_debug_listener = None
+
+# True once the debug log is open. Hot paths check it before building their
+# debug_log() message, so the f-strings cost nothing while debugging is off.
+_DEBUG = False
+
+def init_debug_logging():
+    """Start the background writer for DEBUG_LOG (no-op when disabled)"""
+    global _debug_listener, _DEBUG
+    if not DEBUG_LOG or _debug_listener is not None:
         return
     try:
-        with open(DEBUG_LOG, 'a') as f:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            f.write(f"[{timestamp}] {message}\n")
-            f.flush()
-    except:
-        pass  # Ignore errors in debug logging
+        file_handler = logging.handlers.RotatingFileHandler(
+            DEBUG_LOG, maxBytes=64 * 1024 * 1024, backupCount=3)
+    except OSError as e:
+        print(f"Warning: Could not open debug log {DEBUG_LOG}: {e}")
+        return
+    file_handler.setFormatter(logging.Formatter(
+        '[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+    log_queue = queue.SimpleQueue()
+    debug_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    debug_logger.setLevel(logging.DEBUG)
+    _debug_listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _debug_listener.start()
+    atexit.register(_debug_listener.stop)
+    _DEBUG = True
+
+def debug_log(message):
+    """Queue a debug message for the debug log writer"""
+    if _debug_listener is not None:
+        debug_logger.debug(message)
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used for jsonify and Socket.IO)"""
+
+    def dumps(self, obj, **kwargs):
+        # orjson output is always compact; stdlib-style kwargs such as
+        # separators (passed by python-socketio) are irrelevant
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = SECRET_KEY
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet', json=app.json)
+else:
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
 def init_database():
     """Initialize SQLite database with required tables"""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
+
+    # Lets cleanup_old_data release deleted pages with incremental_vacuum.
+    # Only takes effect for a new database (before the first table exists).
+    cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
+    # WAL lets the dashboard read while the writer thread commits; the journal
+    # mode is persistent, so setting it once here applies to every connection.
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     # Requests table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS requests (
@@ -189,7 +289,20 @@ def init_database():
     # Indexes for better query performance
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON requests(timestamp)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_project ON requests(project)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pool ON requests(pool)')
+    # Time ranges of the analytics queries, which all exclude overview map
+    # requests. Partial, so those rows are never visited; the queries must
+    # spell the predicate exactly as here for the planner to use it.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_timestamp_no_overview ON requests(timestamp)
+        WHERE LOWER(layers) != 'overview'
+    ''')
+    # Per-pool GETMAP stats for a time window (calculate_response_stats_from_db).
+    # Including response_time_ms makes it a covering index: the stats query
+    # is answered from the index alone. Its pool prefix also serves plain
+    # pool filters, so the former single-column and 3-column indexes go.
+    cursor.execute('DROP INDEX IF EXISTS idx_pool')
+    cursor.execute('DROP INDEX IF EXISTS idx_pool_type_ts')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pool_type_ts_rt ON requests(pool, request_type, timestamp, response_time_ms)')
     
     # System metrics table
     cursor.execute('''
@@ -219,6 +332,21 @@ def init_database():
 
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_sys_timestamp ON system_metrics(timestamp)')
 
+    # Hourly averages of system_metrics for completed hours, filled by
+    # rollup_system_metrics(); timestamp is the start of the hour
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_metrics_hourly (
+            timestamp TEXT PRIMARY KEY,
+            cpu_percent REAL,
+            memory_percent REAL,
+            memory_used_gb REAL,
+            memory_available_gb REAL,
+            memory_total_gb REAL,
+            swap_used_gb REAL,
+            swap_percent REAL
+        )
+    ''')
+
     # Usage log table - tracks all request types (GETMAP, GETFEATUREINFO, GETPRINT, GETFEATURE, WFS-T)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS usage_log (
@@ -251,77 +379,238 @@ def init_database():
     debug_log(f"Database initialized at {DB_PATH}")
     print(f"Database initialized at {DB_PATH}")
 
-# Initialize database on startup
+# Initialize debug logging and database on startup
+init_debug_logging()
 init_database()
 
-def save_request_to_db(pool, project, user, layers, request_type, response_time_ms, request_id):
-    """Save a request to the database"""
+# Pending database writes. The save_* functions only put a row tuple here;
+# db_writer_thread() flushes them in a single transaction every
+# DB_FLUSH_INTERVAL seconds. SimpleQueue is safe to share with the atexit
+# flush without a separate lock. Timestamps are queued as the text that is
+# stored ('YYYY-MM-DD HH:MM:SS.ffffff'), formatted with isoformat(' ') like
+# sqlite3's implicit datetime adapter, which is deprecated since Python 3.12.
+_pending_requests = queue.SimpleQueue()
+_pending_usage = queue.SimpleQueue()
+_pending_metrics = queue.SimpleQueue()
+
+# Bumped after every commit that adds or removes rows of the requests table;
+# the analytics ETags are built from it (see conditional_get)
+_requests_version = 0
+
+# Insert statements used by the writer. The SQL text is fixed and all values
+# are bound as parameters, so sqlite3's per-connection statement cache keeps
+# each one compiled across flushes.
+INSERT_REQUEST_SQL = '''
+    INSERT INTO requests (timestamp, pool, project, user, layers, request_type, response_time_ms, request_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_USAGE_SQL = '''
+    INSERT INTO usage_log (timestamp, pool, project, user, layers, template, request_type, action, response_time_ms, request_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_METRICS_SQL = '''
+    INSERT INTO system_metrics (timestamp, cpu_percent, memory_percent, memory_used_gb,
+                               memory_available_gb, memory_total_gb, swap_used_gb, swap_percent)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Dedicated connection of the writer thread, opened on first flush and kept
+# for the lifetime of the process
+_writer_conn = None
+
+def configure_connection(conn):
+    """Apply per-connection PRAGMAs (WAL itself is set once in init_database)"""
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA wal_autocheckpoint=1000')
+    return conn
+
+def get_writer_connection():
+    """Return the persistent writer connection, opening it on first use"""
+    global _writer_conn
+    if _writer_conn is None:
+        _writer_conn = configure_connection(sqlite3.connect(
+            DB_PATH, isolation_level=None, check_same_thread=False, cached_statements=128
+        ))
+    return _writer_conn
+
+# Read connection shared by the stats, cleanup and API code running on each
+# thread. Opening a connection costs a file open plus schema parsing, and a
+# fresh one starts with a cold page cache. All greenlets run on one OS thread
+# and a query never yields mid-statement, so one connection per thread is
+# all that can be used at a time. Set row_factory on the cursor, not here.
+_db_conn_local = threading.local()
+
+def get_conn():
+    """Return this thread's persistent database connection, opening it on first use"""
+    conn = getattr(_db_conn_local, 'conn', None)
+    if conn is None:
+        conn = _db_conn_local.conn = configure_connection(sqlite3.connect(
+            DB_PATH, isolation_level=None, check_same_thread=False, cached_statements=128
+        ))
+    return conn
+
+def _queue_row(pending, row):
+    """Buffer a row for the writer thread; flush right away if the buffer is full"""
+    pending.put_nowait(row)
+    if _pending_requests.qsize() + _pending_usage.qsize() + _pending_metrics.qsize() >= DB_FLUSH_MAX_ROWS:
+        flush_pending_writes()
+
+def _drain(pending):
+    """Take every row currently buffered in a pending queue"""
+    rows = []
     try:
-        debug_log(f"DEBUG [DB] Attempting to save: pool={pool}, project={project}, user={user}, type={request_type}, time={response_time_ms}ms")
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO requests (timestamp, pool, project, user, layers, request_type, response_time_ms, request_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (datetime.now(), pool, project, user, layers, request_type, response_time_ms, request_id))
-        conn.commit()
-        conn.close()
-        debug_log(f"DEBUG [DB] ✓ Successfully saved request to database")
-    except Exception as e:
-        debug_log(f"DEBUG [DB] ✗ ERROR saving request to DB: {e}")
-        import traceback
-        traceback.print_exc()
+        while True:
+            rows.append(pending.get_nowait())
+    except queue.Empty:
+        return rows
+
+def flush_pending_writes():
+    """Write all buffered rows to the database in a single transaction"""
+    global _requests_version
+    
+    request_rows = _drain(_pending_requests)
+    usage_rows = _drain(_pending_usage)
+    metrics_rows = _drain(_pending_metrics)
 
-def save_usage_log_to_db(pool, project, user, layers, request_type, action, response_time_ms, request_id, template=None):
-    """Save a usage log entry (any request type) to usage_log table"""
+    if not (request_rows or usage_rows or metrics_rows):
+        return
+
+    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO usage_log (timestamp, pool, project, user, layers, template, request_type, action, response_time_ms, request_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (datetime.now(), pool, project, user, layers, template, request_type, action, response_time_ms, request_id))
-        conn.commit()
-        conn.close()
+        conn = get_writer_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        if request_rows:
+            conn.executemany(INSERT_REQUEST_SQL, request_rows)
+        if usage_rows:
+            conn.executemany(INSERT_USAGE_SQL, usage_rows)
+        if metrics_rows:
+            conn.executemany(INSERT_METRICS_SQL, metrics_rows)
+        conn.execute('COMMIT')
+        if request_rows:
+            _requests_version += 1
+        debug_log(f"DEBUG [DB] ✓ Flushed {len(request_rows)} requests, {len(usage_rows)} usage entries, {len(metrics_rows)} metrics")
     except Exception as e:
-        debug_log(f"DEBUG [DB] ✗ ERROR saving usage log: {e}")
+        if conn is not None and conn.in_transaction:
+            conn.execute('ROLLBACK')
+        print(f"Error flushing {len(request_rows) + len(usage_rows) + len(metrics_rows)} buffered rows to DB: {e}")
+
+def save_request_to_db(pool, project, user, layers, request_type, response_time_ms, request_id):
+    """Queue a request for the next batched database write"""
+    if _DEBUG:
+        debug_log(f"DEBUG [DB] Queueing: pool={pool}, project={project}, user={user}, type={request_type}, time={response_time_ms}ms")
+    _queue_row(_pending_requests, (datetime.now().isoformat(' '), pool, project, user, layers, request_type, response_time_ms, request_id))
+
+def save_usage_log_to_db(pool, project, user, layers, request_type, action, response_time_ms, request_id, template=None):
+    """Queue a usage log entry (any request type) for the next batched write"""
+    _queue_row(_pending_usage, (datetime.now().isoformat(' '), pool, project, user, layers, template, request_type, action, response_time_ms, request_id))
 
 def save_system_metrics_to_db(cpu, mem_percent, mem_used_gb, mem_avail_gb, mem_total_gb, disk_read, disk_write, net_sent, net_recv, swap_used_gb=0, swap_percent=0):
-    """Save system metrics to the database"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO system_metrics (timestamp, cpu_percent, memory_percent, memory_used_gb,
-                                       memory_available_gb, memory_total_gb, swap_used_gb, swap_percent)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (datetime.now(), cpu, mem_percent, mem_used_gb, mem_avail_gb, mem_total_gb, swap_used_gb, swap_percent))
+    """Queue system metrics for the next batched database write"""
+    _queue_row(_pending_metrics, (datetime.now().isoformat(' '), cpu, mem_percent, mem_used_gb, mem_avail_gb, mem_total_gb, swap_used_gb, swap_percent))
+
+# Don't lose the last DB_FLUSH_INTERVAL seconds of buffered rows when the
+# interpreter exits (for SIGTERM see handle_sigterm)
+atexit.register(flush_pending_writes)
+
+def db_writer_thread():
+    """Background thread that flushes buffered rows to the database"""
+    print("Database writer thread started")
+
+    while True:
+        socketio.sleep(DB_FLUSH_INTERVAL)
+        flush_pending_writes()
+
+def delete_older_than(conn, table, days):
+    """Delete rows older than `days` from table in batches of CLEANUP_BATCH_SIZE.
+
+    Each batch is its own short transaction, so the writer thread and the
+    dashboard queries get the database in between instead of waiting for one
+    huge DELETE."""
+    deleted = 0
+    while True:
+        cursor = conn.execute(f'''
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table}
+                WHERE timestamp < datetime('now', '-' || ? || ' days')
+                LIMIT ?
+            )
+        ''', [days, CLEANUP_BATCH_SIZE])
         conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error saving system metrics to DB: {e}")
+        deleted += cursor.rowcount
+        if cursor.rowcount < CLEANUP_BATCH_SIZE:
+            return deleted
+        socketio.sleep(0)
+
+def rollup_system_metrics(conn):
+    """Aggregate completed hours of system_metrics into system_metrics_hourly.
+
+    Picks up after the last rolled-up hour, one day per statement, so the
+    first run over an existing database does not hold the database (or the
+    hub) for the whole retention period at once."""
+    hour_format = '%Y-%m-%d %H:00:00'
+    current_hour = datetime.now().strftime(hour_format)
+    
+    last = conn.execute('SELECT MAX(timestamp) FROM system_metrics_hourly').fetchone()[0]
+    if last is None:
+        first = conn.execute('SELECT MIN(timestamp) FROM system_metrics').fetchone()[0]
+        if first is None:
+            return
+        start = datetime.fromisoformat(first).replace(minute=0, second=0, microsecond=0)
+    else:
+        start = datetime.fromisoformat(last) + timedelta(hours=1)
+    
+    while start.strftime(hour_format) < current_hour:
+        end = min(start + timedelta(days=1), datetime.fromisoformat(current_hour))
+        conn.execute('''
+            INSERT OR REPLACE INTO system_metrics_hourly
+            SELECT
+                strftime('%Y-%m-%d %H:00:00', timestamp),
+                AVG(cpu_percent),
+                AVG(memory_percent),
+                AVG(memory_used_gb),
+                AVG(memory_available_gb),
+                MAX(memory_total_gb),
+                AVG(swap_used_gb),
+                AVG(swap_percent)
+            FROM system_metrics
+            WHERE timestamp >= ? AND timestamp < ?
+            GROUP BY 1
+        ''', (start.isoformat(' '), end.isoformat(' ')))
+        conn.commit()
+        start = end
+        socketio.sleep(0)
 
 def cleanup_old_data():
     """Remove data older than retention period"""
+    global _requests_version
+    
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        conn = get_conn()
         
-        # Delete requests older than retention period
-        cursor.execute("DELETE FROM requests WHERE timestamp < datetime('now', '-' || ? || ' days')", [REQUEST_RETENTION_DAYS])
+        # Delete requests and usage log entries older than retention period
+        deleted = delete_older_than(conn, 'requests', REQUEST_RETENTION_DAYS)
+        if deleted:
+            _requests_version += 1
+        deleted += delete_older_than(conn, 'usage_log', REQUEST_RETENTION_DAYS)
 
         # Delete system metrics older than retention period
-        cursor.execute("DELETE FROM system_metrics WHERE timestamp < datetime('now', '-' || ? || ' days')", [SYSTEM_METRICS_RETENTION_DAYS])
-
-        # Delete usage log entries older than retention period
-        cursor.execute("DELETE FROM usage_log WHERE timestamp < datetime('now', '-' || ? || ' days')", [REQUEST_RETENTION_DAYS])
-        
-        deleted_requests = cursor.rowcount
-        conn.commit()
-        conn.close()
-        
-        if deleted_requests > 0:
-            print(f"Cleaned up {deleted_requests} old records from database")
+        deleted += delete_older_than(conn, 'system_metrics', SYSTEM_METRICS_RETENTION_DAYS)
+        deleted += delete_older_than(conn, 'system_metrics_hourly', SYSTEM_METRICS_RETENTION_DAYS)
+
+        # Return freed pages to the filesystem without a blocking full VACUUM
+        # (only effective for databases created with auto_vacuum=INCREMENTAL).
+        # The pragma frees one page per step and execute() steps it only once;
+        # executescript() runs it to completion and empties the freelist.
+        conn.executescript('PRAGMA incremental_vacuum')
+        
+        if deleted > 0:
+            # The deletes went through the WAL; checkpoint it and shrink the
+            # file back instead of leaving it at its high-water mark
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            print(f"Cleaned up {deleted} old records from database")
     except Exception as e:
         print(f"Error cleaning up old data: {e}")
 
@@ -330,12 +619,65 @@ def cleanup_old_data():
 monitoring_active = False
 log_monitoring_active = False
 cleanup_active = False
+db_writer_active = False
+
+class ResponseWindow:
+    """Response times of the last `seconds`, kept in arrival order and sorted.
+
+    Samples live in a fixed ring of RESPONSE_TIMES_MAXLEN slots, as parallel
+    typed arrays of timestamps and response times rather than a container of
+    (ts, rt) tuples. Each sample is also inserted into a sorted array once
+    and removed again when it expires, so min/max/p95 are index lookups and
+    the average comes from a running total instead of a walk over the window
+    on every stats push."""
+
+    __slots__ = ('seconds', 'timestamps', 'times', 'head', 'count', 'sorted_times', 'total')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.timestamps = array('d', [0.0]) * RESPONSE_TIMES_MAXLEN
+        self.times = array('l', [0]) * RESPONSE_TIMES_MAXLEN
+        self.head = 0                   # slot of the oldest sample
+        self.count = 0
+        self.sorted_times = array('l')  # the same response times, ascending
+        self.total = 0
+
+    def add(self, ts, rt):
+        if self.count == RESPONSE_TIMES_MAXLEN:
+            self._drop_oldest()
+        slot = (self.head + self.count) % RESPONSE_TIMES_MAXLEN
+        self.timestamps[slot] = ts
+        self.times[slot] = rt
+        self.count += 1
+        bisect.insort(self.sorted_times, rt)
+        self.total += rt
+        self.expire(ts)
+
+    def expire(self, now):
+        cutoff = now - self.seconds
+        timestamps = self.timestamps
+        while self.count and timestamps[self.head] < cutoff:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        rt = self.times[self.head]
+        self.head = (self.head + 1) % RESPONSE_TIMES_MAXLEN
+        self.count -= 1
+        del self.sorted_times[bisect.bisect_left(self.sorted_times, rt)]
+        self.total -= rt
+
+# Response time storage - hot tier for the live 10/30 minute stats, one
+# ResponseWindow per window length; the database is the cold tier
+LIVE_STATS_WINDOWS = (600, RESPONSE_TIMES_WINDOW)
+response_times = {
+    pool: {seconds: ResponseWindow(seconds) for seconds in LIVE_STATS_WINDOWS}
+    for pool in POOL_NAMES
+}
 
-# Response time storage - keep last 24 hours with timestamps
-response_times = {pool: deque(maxlen=RESPONSE_TIMES_MAXLEN) for pool in POOL_NAMES}
-
-# Request details tracking - stores info about ongoing requests by request_id
+# Request details tracking - ongoing requests per pool as
+# {request_id: deque of detail dicts}, oldest first
 current_requests = {pool: {} for pool in POOL_NAMES}
+_last_request_sweep = {pool: 0 for pool in POOL_NAMES}
 
 # --- Nginx edit correlation state ------------------------------------------
 # Last LIZMAP_USER seen in the QGIS Server log, keyed for correlation with
@@ -348,13 +690,37 @@ _last_user_by_project_layer: dict = {}    # key: (project, layerId) -> (user, ts
 # repository, layer, ts)
 _pending_edit_by_ip: dict = {}
 
-# Slowest requests in last N minutes
+# Slowest requests in last N minutes, as a min-heap (fastest of the kept
+# requests at [0]) of flat records:
+# (response_time, timestamp, request_id, map, user, layers, request_type)
+# Use format_slowest() for the slowest-first list sent to clients.
 slowest_requests = {pool: [] for pool in POOL_NAMES}
 
+# format_slowest() results per pool; dropped whenever the pool's heap changes
+_slowest_formatted = {}
+
+# Wall-clock time of recent_issues entries, formatted at most once a second
+# (log floods can produce thousands of warnings per second)
+_last_hms = [0, '']
+
+def _now_hms():
+    """Current local time as HH:MM:SS"""
+    now = int(time.time())
+    if now != _last_hms[0]:
+        _last_hms[0] = now
+        _last_hms[1] = time.strftime('%H:%M:%S', time.localtime(now))
+    return _last_hms[1]
+
 # Statistics storage
 log_stats = {pool: {'requests_total': 0, 'errors': 0, 'warnings': 0} for pool in POOL_NAMES}
 log_stats['php-fpm'] = {'errors': 0, 'warnings': 0}
 
+# Last metrics_update payload broadcast by monitoring_thread
+latest_metrics_update = None
+
+# Last stats_update payload broadcast by log_monitoring_thread
+latest_stats_update = None
+
 # Recent errors/warnings
 recent_issues = {pool: deque(maxlen=RECENT_ISSUES_MAXLEN) for pool in POOL_NAMES}
 recent_issues['php-fpm'] = deque(maxlen=RECENT_ISSUES_MAXLEN)
@@ -362,9 +728,14 @@ recent_issues['php-fpm'] = deque(maxlen=RECENT_ISSUES_MAXLEN)
 def get_system_metrics():
     """Collect current system metrics"""
     
-    # CPU Usage (per core and total)
-    cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
-    cpu_total = psutil.cpu_percent(interval=0)
+    # CPU Usage (per core and total). interval=None compares against the
+    # previous call instead of sleeping for a sample window: psutil's sleep
+    # is a real time.sleep that would stall every greenlet for a second. The
+    # monitoring thread calls this every METRICS_PUSH_INTERVAL, which is
+    # therefore the window. The total is derived from the same per-core
+    # sample rather than a second /proc/stat read.
+    cpu_percent = psutil.cpu_percent(interval=None, percpu=True)
+    cpu_total = round(sum(cpu_percent) / len(cpu_percent), 1)
     
     # Memory Usage
     memory = psutil.virtual_memory()
@@ -406,16 +777,54 @@ def get_system_metrics():
         }
     }
 
+# QGIS Server log patterns, compiled once at import (parse_qgis_log_line runs
+# for every line of every pool)
+_WFS_TYPENAME_RE = re.compile(r'typeName[=:\s]+([^\s&"\'<>]+)', re.IGNORECASE)
+_RESPONSE_TIME_RE = re.compile(r'(\d+)\s*ms')
+
+# Detail-field patterns, grouped by leading literal: fields sharing a first
+# character are one alternation (one scan per group instead of per field),
+# while each group still starts with a fixed literal so SRE can skip ahead to
+# candidate positions with its fast prefix search. Read values with _field().
+_M_FIELDS_RE = re.compile(r'MAP:(?P<map>[^\s]+)')
+_L_FIELDS_RE = re.compile(r'L(?:IZMAP_USER:(?P<user>[^\s]+)|AYERS?:(?P<layers>.+?)(?:\s|$))')
+_T_FIELDS_RE = re.compile(r'T(?:YPENAME:(?P<typename>[^\s]+)|EMPLATE:(?P<template>[^\s]+))')
+_R_FIELDS_RE = re.compile(r'REQUEST:(?P<request_type>[^\s]+)')
+
+def _request_id(line):
+    """Return the digits of the first "[<digits>]" in line, or None.
+
+    Plain str.find/slicing: cheaper than a regex search for this fixed shape."""
+    lb = line.find('[')
+    while lb >= 0:
+        rb = line.find(']', lb + 1)
+        if rb < 0:
+            return None
+        request_id = line[lb + 1:rb]
+        if request_id.isdecimal():
+            return request_id
+        lb = line.find('[', lb + 1)
+    return None
+
+def _field(pattern, line, name):
+    """Return the first value of the named group `name` of a grouped field pattern"""
+    for m in pattern.finditer(line):
+        value = m.group(name)
+        if value is not None:
+            return value
+    return None
+
 def parse_qgis_log_line(line, log_name):
     """Parse a QGIS server log line and extract request details and response times"""
     now = time.time()
     
-    # Extract request ID from line (format: [1660428])
-    request_id_match = re.search(r'\[(\d+)\]', line)
-    request_id = request_id_match.group(1) if request_id_match else None
+    # Extract request ID from line (format: [1660428]). It and each regex
+    # below are gated by a plain substring test: `in` is a fast C scan, and most lines
+    # contain none of the markers, so the regex engine only runs on candidates.
+    request_id = _request_id(line) if '[' in line else None
     
     # DEBUG: Show every line that has a request ID
-    if request_id and ('MAP:' in line or 'REQUEST:' in line or 'TEMPLATE:' in line or 'Request finished' in line.lower()):
+    if _DEBUG and request_id and ('MAP:' in line or 'REQUEST:' in line or 'TEMPLATE:' in line or 'Request finished' in line.lower()):
         debug_log(f"DEBUG [{log_name}] Processing line with ID [{request_id}]: {line[:150]}")
 
     # WFS-T Transact detection – detect INSERT/UPDATE/DELETE in WFS lines
@@ -423,29 +832,28 @@ def parse_qgis_log_line(line, log_name):
     if 'WFS' in line_upper and any(op in line_upper for op in ('INSERT', 'UPDATE', 'DELETE')):
         wfst_action = next((op for op in ('INSERT', 'UPDATE', 'DELETE') if op in line_upper), None)
         if wfst_action:
-            typename_match = re.search(r'typeName[=:\s]+([^\s&"\'<>]+)', line, re.IGNORECASE)
+            typename_match = _WFS_TYPENAME_RE.search(line)
             wfst_layer = typename_match.group(1) if typename_match else 'Unknown'
-            user_match = re.search(r'LIZMAP_USER:([^\s]+)', line)
-            wfst_user = user_match.group(1) if user_match else 'Unknown'
-            debug_log(f"DEBUG [{log_name}] WFS-T {wfst_action}: layer={wfst_layer}, user={wfst_user}")
-            socketio.start_background_task(
-                save_usage_log_to_db,
+            wfst_user = (_field(_L_FIELDS_RE, line, 'user') if 'LIZMAP_USER:' in line else None) or 'Unknown'
+            if _DEBUG:
+                debug_log(f"DEBUG [{log_name}] WFS-T {wfst_action}: layer={wfst_layer}, user={wfst_user}")
+            save_usage_log_to_db(
                 log_name, None, wfst_user, wfst_layer,
                 'WFS-T', wfst_action, None, request_id
             )
 
     # Check for errors/warnings (store for display)
-    if 'WARNING' in line or 'WARN' in line:
+    if 'WARN' in line:  # also matches WARNING
         log_stats[log_name]['warnings'] += 1
         recent_issues[log_name].append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'timestamp': _now_hms(),
             'level': 'WARNING',
             'message': line.strip()[:200]  # Truncate long messages
         })
     elif 'ERROR' in line or 'CRITICAL' in line:
         log_stats[log_name]['errors'] += 1
         recent_issues[log_name].append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'timestamp': _now_hms(),
             'level': 'ERROR',
             'message': line.strip()[:200]
         })
@@ -453,20 +861,19 @@ def parse_qgis_log_line(line, log_name):
     # If we have a request ID, track request details
     if request_id:
         # Check if this is a new request starting (has "QGIS Request accepted" or first detail line)
-        # Create a unique key combining request_id and timestamp to handle ID recycling
         is_new_request = False
         
         # Detect start of new request
-        if 'QGIS Request accepted' in line or ('MAP:' in line and not any(request_id in k for k in current_requests[log_name].keys())):
+        if 'QGIS Request accepted' in line or ('MAP:' in line and request_id not in current_requests[log_name]):
             is_new_request = True
-            debug_log(f"DEBUG [{log_name}] NEW REQUEST detected for ID [{request_id}]")
-        
-        # Find or create the tracking key for this request
-        tracking_key = None
-        if is_new_request:
-            # Create new unique key: request_id + timestamp in milliseconds
-            tracking_key = f"{request_id}_{int(now * 1000)}"
-            current_requests[log_name][tracking_key] = {
+            if _DEBUG:
+                debug_log(f"DEBUG [{log_name}] NEW REQUEST detected for ID [{request_id}]")
+        
+        # Requests seen under this ID, oldest first. IDs get recycled, so a
+        # new request is appended and detail lines go to the most recent one.
+        pending = current_requests[log_name].get(request_id)
+        if is_new_request or not pending:
+            details = {
                 'map': None,
                 'user': None,
                 'layers': None,
@@ -474,93 +881,85 @@ def parse_qgis_log_line(line, log_name):
                 'start_time': now,
                 'raw_request_id': request_id
             }
-            debug_log(f"DEBUG [{log_name}] Created tracking key: {tracking_key}")
+            if pending is None:
+                pending = current_requests[log_name][request_id] = deque()
+            pending.append(details)
+            if _DEBUG:
+                debug_log(f"DEBUG [{log_name}] Tracking request [{request_id}] ({len(pending)} open with this ID)")
         else:
-            # Find most recent key for this request_id
-            matching_keys = [k for k in current_requests[log_name].keys() if k.startswith(f"{request_id}_")]
-            if matching_keys:
-                # Get the most recent one (highest timestamp)
-                tracking_key = max(matching_keys, key=lambda k: int(k.split('_')[1]))
-            else:
-                # No existing key found, create one anyway
-                tracking_key = f"{request_id}_{int(now * 1000)}"
-                current_requests[log_name][tracking_key] = {
-                    'map': None,
-                    'user': None,
-                    'layers': None,
-                    'request_type': None,
-                    'start_time': now,
-                    'raw_request_id': request_id
-                }
-                debug_log(f"DEBUG [{log_name}] No existing key, created: {tracking_key}")
+            details = pending[-1]
         
         # Extract request details from DEBUG lines
         if 'MAP:' in line:
-            map_match = re.search(r'MAP:([^\s]+)', line)
-            if map_match:
+            map_path = _field(_M_FIELDS_RE, line, 'map')
+            if map_path:
                 # Extract just the project name from path
-                map_path = map_match.group(1)
                 project_name = map_path.split('/')[-1].replace('.qgs', '')
-                current_requests[log_name][tracking_key]['map'] = project_name
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set MAP: {project_name}")
+                details['map'] = project_name
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set MAP: {project_name}")
         
         elif 'LIZMAP_USER:' in line:
-            user_match = re.search(r'LIZMAP_USER:([^\s]+)', line)
-            if user_match:
-                current_requests[log_name][tracking_key]['user'] = user_match.group(1)
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set USER: {user_match.group(1)}")
+            user = _field(_L_FIELDS_RE, line, 'user')
+            if user:
+                details['user'] = user
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set USER: {user}")
         
         elif 'LAYERS:' in line or ('LAYER:' in line and 'LIZMAP' not in line and 'EXP_FILTER' not in line):
-            layers_match = re.search(r'LAYERS?:(.+?)(?:\s|$)', line)
-            if layers_match:
-                layers = layers_match.group(1).strip()
-                current_requests[log_name][tracking_key]['layers'] = layers
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set LAYERS: {layers[:50]}...")
+            layers = _field(_L_FIELDS_RE, line, 'layers')
+            if layers:
+                layers = layers.strip()
+                details['layers'] = layers
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set LAYERS: {layers[:50]}...")
 
         elif 'TYPENAME:' in line:
-            typename_match = re.search(r'TYPENAME:([^\s]+)', line)
-            if typename_match:
-                typename = typename_match.group(1).strip()
-                current_requests[log_name][tracking_key]['layers'] = typename
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set TYPENAME: {typename}")
+            typename = _field(_T_FIELDS_RE, line, 'typename')
+            if typename:
+                typename = typename.strip()
+                details['layers'] = typename
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set TYPENAME: {typename}")
 
         elif 'TEMPLATE:' in line:
-            template_match = re.search(r'TEMPLATE:([^\s]+)', line, re.IGNORECASE)
-            if template_match:
-                template = unquote(template_match.group(1))
-                current_requests[log_name][tracking_key]['template'] = template
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set TEMPLATE: {template}")
+            template = _field(_T_FIELDS_RE, line, 'template')
+            if template:
+                template = unquote(template)
+                details['template'] = template
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set TEMPLATE: {template}")
 
         elif 'REQUEST:' in line:
-            request_match = re.search(r'REQUEST:([^\s]+)', line)
-            if request_match:
-                current_requests[log_name][tracking_key]['request_type'] = request_match.group(1).upper()
-                debug_log(f"DEBUG [{log_name}] [{tracking_key}] Set REQUEST: {request_match.group(1).upper()}")
+            request_type = _field(_R_FIELDS_RE, line, 'request_type')
+            if request_type:
+                details['request_type'] = request_type.upper()
+                if _DEBUG:
+                    debug_log(f"DEBUG [{log_name}] [{request_id}] Set REQUEST: {request_type.upper()}")
     
     # Check for "Request finished" to get complete request time
     if request_id and ('Request finished' in line or 'request finished' in line):
-        time_match = re.search(r'(\d+)\s*ms', line)
+        time_match = _RESPONSE_TIME_RE.search(line)
         if time_match:
             response_time = int(time_match.group(1))
-            debug_log(f"DEBUG [{log_name}] REQUEST FINISHED for ID [{request_id}] in {response_time}ms")
+            if _DEBUG:
+                debug_log(f"DEBUG [{log_name}] REQUEST FINISHED for ID [{request_id}] in {response_time}ms")
             
             # Store the response time with timestamp
             if response_time > 0:
-                response_times[log_name].append((now, response_time))
+                for window in response_times[log_name].values():
+                    window.add(now, response_time)
                 log_stats[log_name]['requests_total'] += 1
                 
-                # Find the most recent tracking key for this request_id
-                matching_keys = [k for k in current_requests[log_name].keys() if k.startswith(f"{request_id}_")]
-                
-                debug_log(f"DEBUG [{log_name}] Found {len(matching_keys)} matching keys for [{request_id}]")
-                
-                if matching_keys:
-                    # Get the most recent one (closest to "finished" time)
-                    tracking_key = max(matching_keys, key=lambda k: int(k.split('_')[1]))
-                    details = current_requests[log_name][tracking_key]
+                pending = current_requests[log_name].get(request_id)
+                if pending:
+                    # The most recent request under this ID is the one finishing
+                    details = pending.pop()
+                    if not pending:
+                        del current_requests[log_name][request_id]
                     
-                    debug_log(f"DEBUG [{log_name}] Using key: {tracking_key}")
-                    debug_log(f"DEBUG [{log_name}] Details: MAP={details.get('map')}, USER={details.get('user')}, TYPE={details.get('request_type')}")
+                    if _DEBUG:
+                        debug_log(f"DEBUG [{log_name}] Details: MAP={details.get('map')}, USER={details.get('user')}, TYPE={details.get('request_type')}")
 
                     # Remember the last real user active on this project/layer so
                     # nginx edits (which have no username) can be attributed. Every
@@ -579,11 +978,12 @@ def parse_qgis_log_line(line, log_name):
                     
                     # Safety check: Skip if request_type is None or empty
                     if not request_type:
-                        debug_log(f"DEBUG [{log_name}] ✗ SKIPPING (no request type): MAP={details.get('map')}")
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✗ SKIPPING (no request type): MAP={details.get('map')}")
                     elif request_type.upper() == 'GETMAP':
-                        debug_log(f"DEBUG [{log_name}] ✓ SAVING to DB (GETMAP): {details.get('map')}")
-                        socketio.start_background_task(
-                            save_request_to_db,
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✓ SAVING to DB (GETMAP): {details.get('map')}")
+                        save_request_to_db(
                             log_name,
                             details.get('map', 'Unknown'),
                             details.get('user', 'Unknown'),
@@ -593,8 +993,7 @@ def parse_qgis_log_line(line, log_name):
                             request_id
                         )
                         # Also log to usage_log for Nutzungsprotokoll
-                        socketio.start_background_task(
-                            save_usage_log_to_db,
+                        save_usage_log_to_db(
                             log_name,
                             details.get('map', 'Unknown'),
                             details.get('user', 'Unknown'),
@@ -604,9 +1003,9 @@ def parse_qgis_log_line(line, log_name):
                         )
                     elif request_type.upper() in ('GETPRINT', 'GETPRINTATLAS'):
                         tmpl = details.get('template')
-                        debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog ({request_type.upper()}): {details.get('map')} template={tmpl}")
-                        socketio.start_background_task(
-                            save_usage_log_to_db,
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog ({request_type.upper()}): {details.get('map')} template={tmpl}")
+                        save_usage_log_to_db(
                             log_name,
                             details.get('map', 'Unknown'),
                             details.get('user', 'Unknown'),
@@ -617,9 +1016,9 @@ def parse_qgis_log_line(line, log_name):
                         )
                     elif request_type.upper() in ('GETFEATUREINFO', 'GETFEATURE'):
                         # Only in usage_log (not tracked for perf stats)
-                        debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog ({request_type.upper()}): {details.get('map')}")
-                        socketio.start_background_task(
-                            save_usage_log_to_db,
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog ({request_type.upper()}): {details.get('map')}")
+                        save_usage_log_to_db(
                             log_name,
                             details.get('map', 'Unknown'),
                             details.get('user', 'Unknown'),
@@ -628,9 +1027,9 @@ def parse_qgis_log_line(line, log_name):
                             response_time, request_id
                         )
                     elif request_type.upper() == 'TRANSACTION':
-                        debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog (WFS-T Transaction): {details.get('map')}")
-                        socketio.start_background_task(
-                            save_usage_log_to_db,
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✓ SAVING to UsageLog (WFS-T Transaction): {details.get('map')}")
+                        save_usage_log_to_db(
                             log_name,
                             details.get('map', 'Unknown'),
                             details.get('user', 'Unknown'),
@@ -639,27 +1038,33 @@ def parse_qgis_log_line(line, log_name):
                             response_time, request_id
                         )
                     else:
-                        debug_log(f"DEBUG [{log_name}] ✗ SKIPPING (not tracked): {request_type.upper()}")
+                        if _DEBUG:
+                            debug_log(f"DEBUG [{log_name}] ✗ SKIPPING (not tracked): {request_type.upper()}")
                     
                     # Add to slowest requests if it's in top 5 or list is not full
                     add_to_slowest(log_name, response_time, now, request_id, details)
-                    
-                    # Clean up finished request from tracking
-                    del current_requests[log_name][tracking_key]
-                    debug_log(f"DEBUG [{log_name}] Cleaned up tracking key: {tracking_key}")
                 else:
-                    debug_log(f"DEBUG [{log_name}] ✗ ERROR: No matching keys found!")
+                    if _DEBUG:
+                        debug_log(f"DEBUG [{log_name}] ✗ ERROR: No tracked request for [{request_id}]!")
                     
                 return True
     
-    # Clean up old requests (probably incomplete/abandoned)
-    cutoff = now - REQUEST_TRACKING_TIMEOUT
-    to_delete = [key for key, data in current_requests[log_name].items() 
-                 if data.get('start_time', now) < cutoff]
-    if to_delete:
-        debug_log(f"DEBUG [{log_name}] Cleaning up {len(to_delete)} old tracking keys")
-    for key in to_delete:
-        del current_requests[log_name][key]
+    # Clean up old requests (probably incomplete/abandoned). This walks every
+    # open request ID, so it runs at most once per second per pool rather
+    # than on every line.
+    if now - _last_request_sweep[log_name] >= 1:
+        _last_request_sweep[log_name] = now
+        cutoff = now - REQUEST_TRACKING_TIMEOUT
+        to_delete = []
+        for rid, pending in current_requests[log_name].items():
+            while pending and pending[0]['start_time'] < cutoff:
+                pending.popleft()
+            if not pending:
+                to_delete.append(rid)
+        if _DEBUG and to_delete:
+            debug_log(f"DEBUG [{log_name}] Cleaning up {len(to_delete)} old request IDs")
+        for rid in to_delete:
+            del current_requests[log_name][rid]
     
     return False
 
@@ -678,45 +1083,68 @@ def add_to_slowest(log_name, response_time, timestamp, request_id, details):
     # Only keep requests within the configured window
     cutoff = timestamp - SLOWEST_REQUESTS_WINDOW
     
-    # Remove old entries
-    slowest_requests[log_name] = [
-        r for r in slowest_requests[log_name]
-        if r[1] >= cutoff  # r[1] is timestamp
-    ]
+    # Remove old entries (r[1] is timestamp)
+    heap = slowest_requests[log_name]
+    if any(r[1] < cutoff for r in heap):
+        heap = slowest_requests[log_name] = [r for r in heap if r[1] >= cutoff]
+        heapq.heapify(heap)
+        _slowest_formatted.pop(log_name, None)
     
-    # Add new request
+    # Add new request as a flat record (no nested dict per entry)
     request_entry = (
         response_time,
         timestamp,
         request_id,
-        {
-            'map': details.get('map', 'N/A'),
-            'user': details.get('user', 'N/A'),
-            'layers': details.get('layers', 'N/A'),
-            'request_type': details.get('request_type', 'N/A')
-        }
+        details.get('map', 'N/A'),
+        details.get('user', 'N/A'),
+        details.get('layers', 'N/A'),
+        details.get('request_type', 'N/A')
     )
     
-    slowest_requests[log_name].append(request_entry)
-    
-    # Sort by response time (descending) and keep top 5
-    slowest_requests[log_name].sort(reverse=True, key=lambda x: x[0])
-    slowest_requests[log_name] = slowest_requests[log_name][:SLOWEST_REQUESTS_COUNT]
+    # Keep the top SLOWEST_REQUESTS_COUNT: replace the fastest kept request
+    # only if this one is slower
+    if len(heap) < SLOWEST_REQUESTS_COUNT:
+        heapq.heappush(heap, request_entry)
+    elif response_time > heap[0][0]:
+        heapq.heapreplace(heap, request_entry)
+    else:
+        return
+    _slowest_formatted.pop(log_name, None)
+
+def format_slowest(pool):
+    """Slowest requests of a pool as client dicts, slowest first.
+
+    Built once per change of the pool's heap, not on every push or connect."""
+    formatted = _slowest_formatted.get(pool)
+    if formatted is None:
+        formatted = _slowest_formatted[pool] = [
+            {
+                'response_time': r[0],
+                'timestamp': datetime.fromtimestamp(r[1]).strftime('%H:%M:%S'),
+                'request_id': r[2],
+                'map': r[3],
+                'user': r[4],
+                'layers': r[5],
+                'request_type': r[6]
+            }
+            for r in sorted(slowest_requests[pool], key=lambda r: r[0], reverse=True)
+        ]
+    return formatted
 
 def parse_php_log_line(line, log_name):
     """Parse a PHP-FPM log line for errors and warnings"""
     
-    if 'WARNING' in line or 'WARN' in line:
+    if 'WARN' in line:  # also matches WARNING
         log_stats[log_name]['warnings'] += 1
         recent_issues[log_name].append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'timestamp': _now_hms(),
             'level': 'WARNING',
             'message': line.strip()[:200]
         })
     elif 'ERROR' in line or 'CRITICAL' in line or 'Fatal' in line:
         log_stats[log_name]['errors'] += 1
         recent_issues[log_name].append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'timestamp': _now_hms(),
             'level': 'ERROR',
             'message': line.strip()[:200]
         })
@@ -729,9 +1157,15 @@ _NGINX_RE = re.compile(
     r'(?P<status>\d+)\s+\S+\s+"(?P<referer>[^"]*)"'
 )
 
+# Compiled query-string patterns per parameter name (see _qs_get)
+_QS_RES: dict = {}
+
 def _qs_get(url, key):
     """Extract a single query-string parameter value from a URL (case-insensitive key)."""
-    m = re.search(r'[?&]' + re.escape(key) + r'=([^&\s]+)', url, re.IGNORECASE)
+    pattern = _QS_RES.get(key)
+    if pattern is None:
+        pattern = _QS_RES[key] = re.compile(r'[?&]' + re.escape(key) + r'=([^&\s]+)', re.IGNORECASE)
+    m = pattern.search(url)
     return unquote(m.group(1)) if m else None
 
 def _correlate_edit_user(project, layer, now):
@@ -757,6 +1191,9 @@ def parse_nginx_log_line(line, log_name='nginx'):
     save POST carries no project/layer in its URL, so we recover them from the
     preceding create/editFeature GET by the same client IP, and the username by
     correlation with the QGIS Server log (see _correlate_edit_user)."""
+    # Cheap prefilter: skip the full regex for the bulk of (non-edit) traffic
+    if '/lizmap/edition/' not in line.lower():
+        return
     m = _NGINX_RE.match(line)
     if not m:
         return
@@ -820,8 +1257,7 @@ def parse_nginx_log_line(line, log_name='nginx'):
         action = (pending or {}).get('action', 'SAVE')
         user = _correlate_edit_user(project, layer, now)
         debug_log(f"DEBUG [nginx] ✓ EDIT {action}: project={project} layer={layer} user={user}")
-        socketio.start_background_task(
-            save_usage_log_to_db,
+        save_usage_log_to_db(
             repository or 'nginx', project or 'Unknown', user,
             layer, 'WFS-T', action, None, None
         )
@@ -836,8 +1272,7 @@ def parse_nginx_log_line(line, log_name='nginx'):
         layer = _qs_get(path, 'layerId')
         user = _correlate_edit_user(project, layer, now)
         debug_log(f"DEBUG [nginx] ✓ EDIT DELETE: project={project} layer={layer} user={user}")
-        socketio.start_background_task(
-            save_usage_log_to_db,
+        save_usage_log_to_db(
             repository or 'nginx', project or 'Unknown', user,
             layer, 'WFS-T', 'DELETE', None, None
         )
@@ -845,15 +1280,11 @@ def parse_nginx_log_line(line, log_name='nginx'):
 
 def calculate_response_stats(log_name, seconds_ago):
     """Calculate average response time for a given time window"""
-    now = time.time()
-    cutoff = now - seconds_ago
+    window = response_times[log_name][seconds_ago]
+    window.expire(time.time())
     
-    times_in_window = [
-        rt for ts, rt in response_times[log_name]
-        if ts >= cutoff
-    ]
-    
-    if not times_in_window:
+    count = window.count
+    if not count:
         return {
             'avg': 0,
             'min': 0,
@@ -862,60 +1293,44 @@ def calculate_response_stats(log_name, seconds_ago):
             'p95': 0
         }
     
-    times_sorted = sorted(times_in_window)
-    count = len(times_sorted)
-    
+    times = window.sorted_times
     return {
-        'avg': round(sum(times_sorted) / count, 1),
-        'min': min(times_sorted),
-        'max': max(times_sorted),
+        # Whole milliseconds: the dashboard rounds the average anyway, so the
+        # decimal would only add bytes to every stats_update push
+        'avg': round(window.total / count),
+        'min': times[0],
+        'max': times[-1],
         'count': count,
-        'p95': times_sorted[int(count * 0.95)] if count > 0 else 0
+        'p95': times[int(count * 0.95)]
     }
 
 def calculate_response_stats_from_db(pool, seconds_ago):
     """Calculate response stats from database for longer timeframes"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         
-        cutoff_time = datetime.now() - timedelta(seconds=seconds_ago)
+        cutoff_time = (datetime.now() - timedelta(seconds=seconds_ago)).isoformat(' ')
         
+        # One sorted read gives every figure: min/max are the ends, p95 is
+        # an index into the list
         cursor.execute('''
-            SELECT 
-                AVG(response_time_ms) as avg,
-                MIN(response_time_ms) as min,
-                MAX(response_time_ms) as max,
-                COUNT(*) as count
+            SELECT response_time_ms 
             FROM requests
             WHERE pool = ? AND timestamp > ? AND request_type = 'GETMAP'
+            ORDER BY response_time_ms
         ''', (pool, cutoff_time))
         
-        result = cursor.fetchone()
-        conn.close()
+        times = [row[0] for row in cursor.fetchall()]
         
-        if result and result[0] is not None:
-            # Calculate p95 separately if needed (requires sorting)
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT response_time_ms 
-                FROM requests
-                WHERE pool = ? AND timestamp > ? AND request_type = 'GETMAP'
-                ORDER BY response_time_ms
-            ''', (pool, cutoff_time))
-            
-            times = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            p95 = times[int(len(times) * 0.95)] if times else 0
-            
+        if times:
+            count = len(times)
             return {
-                'avg': round(result[0], 1),
-                'min': result[1],
-                'max': result[2],
-                'count': result[3],
-                'p95': p95
+                'avg': round(sum(times) / count),
+                'min': times[0],
+                'max': times[-1],
+                'count': count,
+                'p95': times[int(count * 0.95)]
             }
         else:
             return {
@@ -935,6 +1350,16 @@ def calculate_response_stats_from_db(pool, seconds_ago):
             'p95': 0
         }
 
+def parse_chunk(partial, chunk, log_name, parser_func):
+    """Parse every complete line in partial + chunk (raw bytes from a log).
+
+    Returns the trailing unterminated line, to be prepended to the next chunk,
+    and the number of lines parsed."""
+    *lines, partial = (partial + chunk).split(b'\n')
+    for line in lines:
+        parser_func(line.decode('utf-8', errors='replace'), log_name)
+    return partial, len(lines)
+
 def tail_journalctl(log_name, service_unit, parser_func):
     """Tail systemd journal for a service using journalctl"""
     global log_monitoring_active
@@ -979,6 +1404,70 @@ def tail_journalctl(log_name, service_unit, parser_func):
     except Exception as e:
         print(f"Error in journalctl monitoring for {log_name}: {e}")
 
+# inotify (Linux), bound via ctypes so no extra package is needed. Lets
+# tail_log_file_fallback sleep until the file actually changes instead of
+# waking up every 0.5 s; without it the tail loop keeps polling.
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (+ name)
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+except (OSError, AttributeError):
+    _libc = None
+
+def inotify_open(path, mask):
+    """Create an inotify instance watching path; returns its fd, or None if unavailable"""
+    if _libc is None:
+        return None
+    fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        return None
+    if _libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def inotify_watch_log(path):
+    """inotify fd watching a log file for writes and rotation, or None.
+
+    Besides the file itself, its directory is watched for a new file being
+    created or moved in under the same name (create-style rotation)."""
+    fd = inotify_open(path, IN_MODIFY | IN_MOVE_SELF | IN_DELETE_SELF)
+    if fd is not None:
+        _libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(path) or '.'), IN_CREATE | IN_MOVED_TO)
+    return fd
+
+def inotify_wait(fd, timeout, name=None):
+    """Wait (cooperatively) up to timeout seconds for inotify events.
+
+    Returns the OR of all pending event masks, or 0 on timeout. Directory
+    events (which carry a file name) only count if the name equals `name`."""
+    try:
+        trampoline(fd, read=True, timeout=timeout, timeout_exc=TimeoutError)
+    except TimeoutError:
+        return 0
+    try:
+        data = os.read(fd, 4096)
+    except BlockingIOError:
+        return 0
+    mask = 0
+    offset = 0
+    while offset + _INOTIFY_EVENT.size <= len(data):
+        _wd, event_mask, _cookie, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+        offset += _INOTIFY_EVENT.size
+        if not name_len or data[offset:offset + name_len].rstrip(b'\0') == name:
+            mask |= event_mask
+        offset += name_len
+    return mask
+
 def tail_log_file_fallback(log_name, file_path, parser_func):
     """Fallback: Tail a log file directly using file operations with rotation handling"""
     global log_monitoring_active
@@ -992,24 +1481,30 @@ def tail_log_file_fallback(log_name, file_path, parser_func):
     print(f"Using file fallback for {log_name}: {file_path}")
     
     line_count = 0
+    partial = b''
     last_rotation_check = time.time()
     current_inode = None
-    current_size = None
+    file_name = os.fsencode(os.path.basename(file_path))
     f = None
+    watch_fd = None
     
     try:
-        # Open file and get initial inode + size (with UTF-8 error handling)
-        f = open(file_path, 'r', encoding='utf-8', errors='replace')
-        stat_info = os.fstat(f.fileno())
-        current_inode = stat_info.st_ino
-        current_size = stat_info.st_size
+        # Open file (unbuffered bytes, read in large chunks and decoded per
+        # line) and get initial inode
+        f = open(file_path, 'rb', buffering=0)
+        current_inode = os.fstat(f.fileno()).st_ino
         
         # Go to end of file
         current_pos = f.seek(0, 2)
-        debug_log(f"[{log_name}] Positioned at end of file (inode: {current_inode}, size: {current_size}, pos: {current_pos})")
+        debug_log(f"[{log_name}] Positioned at end of file (inode: {current_inode}, pos: {current_pos})")
+
+        watch_fd = inotify_watch_log(file_path)
+        if watch_fd is None:
+            print(f"[{log_name}] inotify unavailable, polling {file_path}")
         
         while log_monitoring_active:
-            # Check if file was rotated (every 5 seconds)
+            # Check if file was rotated (every 5 seconds, or right away when
+            # inotify reported a rotation)
             now = time.time()
             if now - last_rotation_check >= 5:
                 last_rotation_check = now
@@ -1025,40 +1520,42 @@ def tail_log_file_fallback(log_name, file_path, parser_func):
                         debug_log(f"[{log_name}] LOG ROTATION DETECTED (create)! Old inode: {current_inode}, New inode: {new_inode}")
                         debug_log(f"[{log_name}] Reopening {file_path}...")
                         
-                        # Close old file
+                        # Read what was written to the old file before the
+                        # rotation, then close it
+                        partial, _ = parse_chunk(partial, f.readall(), log_name, parser_func)
+                        if partial:  # its last line had no newline
+                            parser_func(partial.decode('utf-8', errors='replace'), log_name)
+                            partial = b''
                         f.close()
                         
-                        # Open new file (with UTF-8 error handling)
-                        f = open(file_path, 'r', encoding='utf-8', errors='replace')
-                        stat_info = os.fstat(f.fileno())
-                        current_inode = stat_info.st_ino
-                        current_size = stat_info.st_size
+                        # Open new file
+                        f = open(file_path, 'rb', buffering=0)
+                        current_inode = os.fstat(f.fileno()).st_ino
+                        current_pos = 0
                         line_count = 0  # Reset counter for new file
                         
-                        # Start from beginning of new file
-                        f.seek(0, 2)  # Go to end
+                        # Start from beginning of new file: everything in it
+                        # was written after the rotation
+
+                        # The old watch follows the rotated-away inode
+                        if watch_fd is not None:
+                            os.close(watch_fd)
+                        watch_fd = inotify_watch_log(file_path)
                         
-                        debug_log(f"[{log_name}] Successfully reopened file (new inode: {current_inode}, size: {current_size})")
+                        debug_log(f"[{log_name}] Successfully reopened file (new inode: {current_inode}, size: {new_size})")
                         print(f"[{log_name}] Log rotation (create) handled, reopened {file_path}")
                     
-                    # Check for rotation via size decrease (copytruncate method)
-                    elif new_size < current_size:
-                        debug_log(f"[{log_name}] LOG TRUNCATION DETECTED (copytruncate)! Old size: {current_size}, New size: {new_size}")
-                        
-                        # File was truncated - reposition to end
-                        current_pos = f.tell()
-                        f.seek(0, 2)  # Go to new end
-                        new_pos = f.tell()
+                    # Check for rotation via size decrease (copytruncate
+                    # method): the file is now shorter than our read position
+                    elif new_size < current_pos:
+                        debug_log(f"[{log_name}] LOG TRUNCATION DETECTED (copytruncate)! Position: {current_pos}, New size: {new_size}")
                         
-                        current_size = new_size
+                        # File was truncated - read it again from the start
+                        current_pos = f.seek(0)
+                        partial = b''
                         line_count = 0  # Reset counter
                         
-                        debug_log(f"[{log_name}] Repositioned after truncation (old pos: {current_pos}, new pos: {new_pos})")
                         print(f"[{log_name}] Log rotation (copytruncate) handled, repositioned in {file_path}")
-                    
-                    # Update size even if no rotation (file grows normally)
-                    else:
-                        current_size = new_size
                         
                 except OSError as e:
                     # File might not exist during rotation moment
@@ -1066,30 +1563,61 @@ def tail_log_file_fallback(log_name, file_path, parser_func):
                     socketio.sleep(1)
                     continue
             
-            # Read next line
-            line = f.readline()
+            # Read everything appended since the last read, up to 64 KiB
+            chunk = os.read(f.fileno(), 65536)
             
-            if line:
-                line_count += 1
-                if line_count % 100 == 0:
-                    debug_log(f"[{log_name}] Processed {line_count} lines")
-                parser_func(line, log_name)
+            if chunk:
+                current_pos += len(chunk)
+                partial, parsed = parse_chunk(partial, chunk, log_name, parser_func)
+                if (line_count + parsed) // 100 > line_count // 100:
+                    debug_log(f"[{log_name}] Processed {line_count + parsed} lines")
+                line_count += parsed
+                socketio.sleep(0)
+            elif watch_fd is not None:
+                # Sleep until the file changes, waking at the latest for the
+                # next rotation check
+                events = inotify_wait(watch_fd, max(0.1, 5 - (time.time() - last_rotation_check)), file_name)
+                if events & (IN_MOVE_SELF | IN_DELETE_SELF | IN_CREATE | IN_MOVED_TO):
+                    last_rotation_check = 0  # rotated: check right now
             else:
                 socketio.sleep(0.5)
                 
     except Exception as e:
         debug_log(f"ERROR tailing {log_name}: {e}")
         print(f"Error tailing {log_name}: {e}")
-        import traceback
         traceback.print_exc()
     finally:
+        if watch_fd is not None:
+            os.close(watch_fd)
         if f:
             f.close()
             debug_log(f"[{log_name}] File handle closed")
 
+def build_stats_update():
+    """Aggregated response time and error stats for every pool"""
+    stats_update = {}
+    for pool in POOL_NAMES:
+        stats_update[pool] = {
+            '10min': calculate_response_stats(pool, 600),    # In-memory (fast, recent)
+            '30min': calculate_response_stats(pool, RESPONSE_TIMES_WINDOW),  # In-memory (fast, recent)
+            '1hour': calculate_response_stats_from_db(pool, 3600),    # Database (accurate, survives restarts)
+            '24hour': calculate_response_stats_from_db(pool, 86400),  # Database (accurate, survives restarts)
+            'errors': log_stats[pool]['errors'],
+            'warnings': log_stats[pool]['warnings'],
+            'total_requests': log_stats[pool]['requests_total']
+        }
+    
+    # Add PHP-FPM stats (no response times, just errors/warnings)
+    stats_update['php-fpm'] = {
+        'errors': log_stats['php-fpm']['errors'],
+        'warnings': log_stats['php-fpm']['warnings']
+    }
+    
+    return stats_update
+
 def log_monitoring_thread():
     """Start greenlets for each log file using file tailing"""
-    global log_monitoring_active
+    global log_monitoring_active, latest_stats_update
     
     debug_log("=" * 80)
     debug_log("LOG MONITORING THREAD STARTING")
@@ -1141,79 +1669,95 @@ def log_monitoring_thread():
     print(f"Started {len(greenlets)} log monitoring greenlets using file tailing")
     
     # Periodically send aggregated stats to clients
+    last_slowest_update = None
     while log_monitoring_active:
         socketio.sleep(STATS_PUSH_INTERVAL)
         
-        # Calculate stats for different time windows
-        stats_update = {}
-        for pool in POOL_NAMES:
-            stats_update[pool] = {
-                '10min': calculate_response_stats(pool, 600),    # In-memory (fast, recent)
-                '30min': calculate_response_stats(pool, 1800),   # In-memory (fast, recent)
-                '1hour': calculate_response_stats_from_db(pool, 3600),    # Database (accurate, survives restarts)
-                '24hour': calculate_response_stats_from_db(pool, 86400),  # Database (accurate, survives restarts)
-                'errors': log_stats[pool]['errors'],
-                'warnings': log_stats[pool]['warnings'],
-                'total_requests': log_stats[pool]['requests_total']
-            }
-        
-        # Add PHP-FPM stats (no response times, just errors/warnings)
-        stats_update['php-fpm'] = {
-            'errors': log_stats['php-fpm']['errors'],
-            'warnings': log_stats['php-fpm']['warnings']
-        }
-        
-        # Emit to all connected clients
-        socketio.emit('stats_update', stats_update, namespace='/monitoring')
-        
-        # Send slowest requests separately
-        slowest_update = {}
-        for pool in POOL_NAMES:
-            slowest_update[pool] = [
-                {
-                    'response_time': r[0],
-                    'timestamp': datetime.fromtimestamp(r[1]).strftime('%H:%M:%S'),
-                    'request_id': r[2],
-                    'map': r[3]['map'],
-                    'user': r[3]['user'],
-                    'layers': r[3]['layers'],
-                    'request_type': r[3]['request_type']
-                }
-                for r in slowest_requests[pool]
-            ]
+        # Calculate stats for different time windows; kept so connecting
+        # clients get them without another round of database reads. The
+        # windows move with the clock, so idle pools still change now and
+        # then; only a payload equal to the last one is not sent again.
+        stats_update = build_stats_update()
+        if stats_update != latest_stats_update:
+            latest_stats_update = stats_update
+            
+            # Emit to all connected clients
+            socketio.emit('stats_update', latest_stats_update, namespace='/monitoring')
         
-        socketio.emit('slowest_requests', slowest_update, namespace='/monitoring')
+        # Send slowest requests separately. format_slowest() returns the same
+        # list object until the pool's heap changes, so this compare is cheap
+        slowest_update = {pool: format_slowest(pool) for pool in POOL_NAMES}
+        if slowest_update != last_slowest_update:
+            last_slowest_update = slowest_update
+            socketio.emit('slowest_requests', slowest_update, namespace='/monitoring')
 
 
-def get_process_info():
-    """Get info about specific processes we care about"""
-    processes = []
+# Watched server processes by pid, rebuilt every PROCESS_REFRESH_INTERVAL
+_process_cache = {}
+_process_cache_refreshed = 0.0
+
+
+def refresh_process_cache():
+    """Rebuild the pid -> Process map of the server processes we watch"""
+    global _process_cache_refreshed
     
     # Look for py-qgis-server, nginx, php-fpm processes
     target_names = ['qgisserver', 'nginx', 'php-fpm']
     
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
+    # Only the name is needed here; process_iter hands back the same Process
+    # objects across calls, so cpu_percent keeps its baseline per process
+    _process_cache.clear()
+    for proc in psutil.process_iter(['name']):
+        name = proc.info['name']
+        if name and any(target in name.lower() for target in target_names):
+            _process_cache[proc.pid] = proc
+    _process_cache_refreshed = time.monotonic()
+
+def get_process_info():
+    """Get info about specific processes we care about"""
+    global _process_cache_refreshed
+    
+    if time.monotonic() - _process_cache_refreshed > PROCESS_REFRESH_INTERVAL:
+        refresh_process_cache()
+    
+    processes = []
+    gone = False
+    
+    # as_dict() reads the fields inside Process.oneshot(), and only the cached
+    # processes are read instead of every pid on the host
+    for pid, proc in _process_cache.items():
         try:
-            name = proc.info['name'].lower()
-            if any(target in name for target in target_names):
-                processes.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'],
-                    'cpu': round(proc.info['cpu_percent'], 1),
-                    'memory': round(proc.info['memory_percent'], 1),
-                    'status': proc.info['status']
-                })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            info = proc.as_dict(attrs=['name', 'cpu_percent', 'memory_percent', 'status'])
+        except psutil.NoSuchProcess:
+            gone = True
             continue
+        # as_dict() reports fields we may not read as None
+        if info['cpu_percent'] is None or info['memory_percent'] is None:
+            continue
+        processes.append({
+            'pid': pid,
+            'name': info['name'],
+            'cpu': round(info['cpu_percent'], 1),
+            'memory': round(info['memory_percent'], 1),
+            'status': info['status']
+        })
+    
+    # A process went away, so rescan for replacements on the next tick
+    if gone:
+        _process_cache_refreshed = 0.0
     
     return processes
 
 def monitoring_thread():
     """Background thread that continuously sends metrics"""
-    global monitoring_active
+    global monitoring_active, latest_metrics_update
     
     print("Monitoring thread started")
     
+    # Baseline for the first non-blocking CPU sample
+    psutil.cpu_percent(interval=None, percpu=True)
+    socketio.sleep(METRICS_PUSH_INTERVAL)
+    
     while monitoring_active:
         try:
             # Get metrics
@@ -1221,8 +1765,7 @@ def monitoring_thread():
             processes = get_process_info()
             
             # Save system metrics to database (every 2 seconds)
-            socketio.start_background_task(
-                save_system_metrics_to_db,
+            save_system_metrics_to_db(
                 metrics['cpu']['total'],
                 metrics['memory']['percent'],
                 metrics['memory']['used_gb'],
@@ -1236,11 +1779,13 @@ def monitoring_thread():
                 metrics['swap']['percent']
             )
             
-            # Emit to all connected clients
-            socketio.emit('metrics_update', {
+            # One broadcast per tick for all connected clients; the payload is
+            # kept so newly connecting clients get it without a fresh sample
+            latest_metrics_update = {
                 'system': metrics,
                 'processes': processes
-            }, namespace='/monitoring')
+            }
+            socketio.emit('metrics_update', latest_metrics_update, namespace='/monitoring')
             
             socketio.sleep(METRICS_PUSH_INTERVAL)
             
@@ -1249,19 +1794,25 @@ def monitoring_thread():
             socketio.sleep(5)
 
 def cleanup_thread():
-    """Background thread that cleans up old data daily"""
+    """Background thread that rolls up system metrics hourly and cleans up old data daily"""
     print("Cleanup thread started")
     
+    last_cleanup = time.monotonic()
+    
     while True:
         try:
-            socketio.sleep(CLEANUP_INTERVAL)
+            # Roll up the hours completed since the last pass
+            rollup_system_metrics(get_conn())
             
             # Clean up old data
-            cleanup_old_data()
+            if time.monotonic() - last_cleanup >= CLEANUP_INTERVAL:
+                last_cleanup = time.monotonic()
+                cleanup_old_data()
             
         except Exception as e:
             print(f"Error in cleanup thread: {e}")
-            socketio.sleep(3600)  # Wait 1 hour on error
+        
+        socketio.sleep(ROLLUP_INTERVAL)
 
 def build_user_filter():
     """Build SQL filter clause based on include_admin / include_anonymous query params."""
@@ -1274,6 +1825,91 @@ def build_user_filter():
         clauses.append("user != 'Unknown'")
     return (' AND ' + ' AND '.join(clauses)) if clauses else ''
 
+# Short-lived cache of JSON endpoint responses whose result barely changes
+# between dashboard refreshes. Key: (view name, query string) ->
+# (expires_at, body, requests version the body was built from)
+_api_cache: dict = {}
+API_CACHE_MAX_ENTRIES = 256
+
+# Tells ETags of this process apart from those of an earlier run, whose
+# _requests_version counted from 0 as well
+_ETAG_PREFIX = format(int(time.time()), 'x')
+
+def requests_etag(version):
+    """ETag for this request's URL, built from the requests table at `version`.
+
+    The path and query string are part of the tag, so a tag issued for one
+    filter set never validates another's cached copy."""
+    url_hash = hashlib.blake2s(request.full_path.encode(), digest_size=8).hexdigest()
+    return f'{_ETAG_PREFIX}-{version}-{url_hash}'
+
+def conditional_get(view):
+    """Answer 304 Not Modified when the requests table is unchanged since the
+    client's copy, without running the view.
+
+    For endpoints whose result depends only on the query string and the rows
+    of the requests table. The version is read before the view runs, so a
+    tag never claims newer data than the body holds."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = requests_etag(_requests_version)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        response = view(*args, **kwargs)
+        if isinstance(response, tuple):  # (body, status): an error, no ETag
+            return response
+        if response.get_etag()[0] is None:
+            response.set_etag(etag)
+        return response
+    return wrapper
+
+def ttl_cached(seconds):
+    """Serve a JSON endpoint's last successful response for `seconds`, per query string"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (view.__name__, request.query_string)
+            now = time.monotonic()
+            hit = _api_cache.get(key)
+            if hit is not None and hit[0] > now:
+                # Tagged with the version it was built from, which may be
+                # older than the current one
+                response = app.response_class(hit[1], mimetype='application/json')
+                response.set_etag(requests_etag(hit[2]))
+                return response
+            version = _requests_version
+            response = view(*args, **kwargs)
+            if isinstance(response, tuple):  # (body, status): an error, don't cache
+                return response
+            response.set_etag(requests_etag(version))
+            if len(_api_cache) >= API_CACHE_MAX_ENTRIES:
+                for k in [k for k, v in _api_cache.items() if v[0] <= now]:
+                    del _api_cache[k]
+                if len(_api_cache) >= API_CACHE_MAX_ENTRIES:
+                    _api_cache.clear()
+            _api_cache[key] = (now + seconds, response.get_data(), version)
+            return response
+        return wrapper
+    return decorator
+
+def in_thread_pool(view):
+    """Run a view in eventlet's pool of OS threads instead of on the hub.
+
+    Without monkey patching, a long sqlite3 query holds the one OS thread the
+    hub runs on, so metrics pushes and log tailing stall until it returns.
+    sqlite3 releases the GIL while it works, so in a pool thread the query
+    runs alongside them. The copied context carries the request and app
+    context over to the pool thread."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        return tpool.execute(contextvars.copy_context().run, view, *args, **kwargs)
+    return wrapper
+
+# Takes effect when tpool starts its threads on the first execute()
+tpool.set_num_threads(DB_QUERY_THREADS)
+
 @app.route('/')
 def index():
     """Serve the dashboard HTML"""
@@ -1288,9 +1924,9 @@ def get_requests_history():
         days = int(request.args.get('days', 7))
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         query = f'''
             SELECT * FROM requests
@@ -1310,43 +1946,41 @@ def get_requests_history():
         query += ' ORDER BY timestamp DESC LIMIT 1000'
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
+        # sqlite3.Row is a mapping, so dict() builds each row in C
+        requests_list = [dict(row) for row in cursor.fetchall()]
         
-        requests_list = []
-        for row in rows:
-            requests_list.append({
-                'id': row['id'],
-                'timestamp': row['timestamp'],
-                'pool': row['pool'],
-                'project': row['project'],
-                'user': row['user'],
-                'layers': row['layers'],
-                'request_type': row['request_type'],
-                'response_time_ms': row['response_time_ms'],
-                'request_id': row['request_id']
-            })
-        
-        conn.close()
         return jsonify(requests_list)
     except Exception as e:
         print(f"Error fetching requests history: {e}")
         return jsonify([]), 500
 
 @app.route('/api/requests/projects')
+@ttl_cached(60)
 def get_projects_list():
     """Get list of all projects"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute('SELECT DISTINCT project FROM requests ORDER BY project')
         projects = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return jsonify(projects)
     except Exception as e:
         print(f"Error fetching projects: {e}")
         return jsonify([]), 500
 
+# Period bucket expressions for the analytics queries. Timestamps are stored
+# as 'YYYY-MM-DD HH:MM:SS.ffffff' text, so hour/day/month buckets are prefixes
+# of it: substr() slices them without strftime() parsing every row as a date.
+# Weeks need the calendar, so they keep strftime().
+PERIOD_SQL = {
+    'hour': "substr(timestamp, 1, 13) || ':00:00'",
+    'day': 'substr(timestamp, 1, 10)',
+    'week': "strftime('%Y-W%W', timestamp)",
+    'month': 'substr(timestamp, 1, 7)'
+}
+
 @app.route('/api/requests/stats')
+@in_thread_pool
 def get_requests_stats():
     """Get statistics about requests"""
     try:
@@ -1354,7 +1988,7 @@ def get_requests_stats():
         days = int(request.args.get('days', 7))
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         # Build time filter based on days parameter
@@ -1367,7 +2001,7 @@ def get_requests_stats():
         # Requests per hour
         query_hourly = f'''
             SELECT 
-                strftime('%Y-%m-%d %H:00:00', timestamp) as hour,
+                {PERIOD_SQL['hour']} as hour,
                 COUNT(*) as count
             FROM requests
             WHERE {time_filter}
@@ -1386,7 +2020,7 @@ def get_requests_stats():
         
         # User activity
         query_users = f'''
-            SELECT user, COUNT(*) as count, AVG(response_time_ms) as avg_time
+            SELECT user, COUNT(*) as count, ROUND(AVG(response_time_ms), 1) as avg_time
             FROM requests
             WHERE {time_filter}
             AND LOWER(layers) != 'overview'{user_filter}
@@ -1400,25 +2034,23 @@ def get_requests_stats():
         query_users += ' GROUP BY user ORDER BY count DESC'
         
         cursor.execute(query_users, params_users)
-        user_activity = [{'user': row[0], 'count': row[1], 'avg_time': round(row[2], 1)} 
+        user_activity = [{'user': row[0], 'count': row[1], 'avg_time': row[2]} 
                         for row in cursor.fetchall()]
         
         # Average response time per project
         query_projects = f'''
-            SELECT project, AVG(response_time_ms) as avg_time, COUNT(*) as count
+            SELECT project, ROUND(AVG(response_time_ms), 1) as avg_time, COUNT(*) as count
             FROM requests
             WHERE {time_filter}
             AND LOWER(layers) != 'overview'{user_filter}
             GROUP BY project
-            ORDER BY avg_time DESC
+            ORDER BY AVG(response_time_ms) DESC
         '''
         
         cursor.execute(query_projects)
-        project_stats = [{'project': row[0], 'avg_time': round(row[1], 1), 'count': row[2]} 
+        project_stats = [{'project': row[0], 'avg_time': row[1], 'count': row[2]} 
                         for row in cursor.fetchall()]
         
-        conn.close()
-        
         return jsonify({
             'hourly': hourly_data,
             'users': user_activity,
@@ -1429,6 +2061,8 @@ def get_requests_stats():
         return jsonify({'hourly': [], 'users': [], 'projects': []}), 500
 
 @app.route('/api/analytics/performance-trends')
+@conditional_get
+@in_thread_pool
 def get_performance_trends():
     """Get performance trends over time with flexible date range and aggregation"""
     try:
@@ -1438,26 +2072,17 @@ def get_performance_trends():
         aggregation = request.args.get('aggregation', 'day')  # hour, day, week, month
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
-        # Build aggregation format
-        agg_formats = {
-            'hour': '%Y-%m-%d %H:00:00',
-            'day': '%Y-%m-%d',
-            'week': '%Y-W%W',
-            'month': '%Y-%m'
-        }
-        agg_format = agg_formats.get(aggregation, '%Y-%m-%d')
+        period_sql = PERIOD_SQL.get(aggregation, PERIOD_SQL['day'])
         
-        # Build query
+        # One query returns every response time sorted by period, then by
+        # time; each period's figures (including P95) come from its run of rows
         query = f'''
             SELECT 
-                strftime('{agg_format}', timestamp) as period,
-                AVG(response_time_ms) as avg_time,
-                COUNT(*) as count,
-                MIN(response_time_ms) as min_time,
-                MAX(response_time_ms) as max_time
+                {period_sql} as period,
+                response_time_ms
             FROM requests
             WHERE timestamp >= ? AND timestamp <= ? AND request_type = 'GETMAP'
             AND LOWER(layers) != 'overview'{user_filter}
@@ -1468,48 +2093,31 @@ def get_performance_trends():
             query += ' AND project = ?'
             params.append(project)
         
-        query += f' GROUP BY strftime(\'{agg_format}\', timestamp) ORDER BY period'
+        query += ' ORDER BY period, response_time_ms'
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
         
-        # Calculate P95 for each period
         results = []
-        for row in rows:
-            period = row[0]
-            # Get P95 for this period
-            p95_query = f'''
-                SELECT response_time_ms 
-                FROM requests
-                WHERE strftime('{agg_format}', timestamp) = ? AND request_type = 'GETMAP'
-                AND LOWER(layers) != 'overview'{user_filter}
-            '''
-            p95_params = [period]
-            if project and project != 'all':
-                p95_query += ' AND project = ?'
-                p95_params.append(project)
-            p95_query += ' ORDER BY response_time_ms'
-            
-            cursor.execute(p95_query, p95_params)
-            times = [r[0] for r in cursor.fetchall()]
-            p95 = times[int(len(times) * 0.95)] if times else 0
-            
+        for period, rows in itertools.groupby(cursor, key=operator.itemgetter(0)):
+            times = [r[1] for r in rows]
+            count = len(times)
             results.append({
                 'period': period,
-                'avg_time': round(row[1], 1),
-                'count': row[2],
-                'min_time': row[3],
-                'max_time': row[4],
-                'p95': round(p95, 1)
+                'avg_time': round(sum(times) / count, 1),
+                'count': count,
+                'min_time': times[0],
+                'max_time': times[-1],
+                'p95': round(times[int(count * 0.95)], 1)
             })
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching performance trends: {e}")
         return jsonify([]), 500
 
 @app.route('/api/analytics/peak-hours')
+@conditional_get
+@in_thread_pool
 def get_peak_hours():
     """Get average response time by hour of day"""
     try:
@@ -1518,13 +2126,13 @@ def get_peak_hours():
         project = request.args.get('project', 'all')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         query = f'''
             SELECT
-                CAST(strftime('%H', timestamp) AS INTEGER) as hour,
-                AVG(response_time_ms) as avg_time,
+                CAST(substr(timestamp, 12, 2) AS INTEGER) as hour,
+                ROUND(AVG(response_time_ms), 1) as avg_time,
                 COUNT(*) as count
             FROM requests
             WHERE timestamp >= ? AND timestamp <= ? AND request_type = 'GETMAP'
@@ -1539,15 +2147,17 @@ def get_peak_hours():
         query += ' GROUP BY hour ORDER BY hour'
         
         cursor.execute(query, params)
-        results = [{'hour': row[0], 'avg_time': round(row[1], 1), 'count': row[2]} for row in cursor.fetchall()]
+        results = [{'hour': row[0], 'avg_time': row[1], 'count': row[2]} for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching peak hours: {e}")
         return jsonify([]), 500
 
 @app.route('/api/analytics/project-rankings')
+@conditional_get
+@ttl_cached(30)
+@in_thread_pool
 def get_project_rankings():
     """Get projects ranked by average response time"""
     try:
@@ -1555,31 +2165,32 @@ def get_project_rankings():
         to_date = request.args.get('to_date')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         cursor.execute(f'''
             SELECT
                 project,
-                AVG(response_time_ms) as avg_time,
+                ROUND(AVG(response_time_ms), 1) as avg_time,
                 COUNT(*) as count
             FROM requests
             WHERE timestamp >= ? AND timestamp <= ? AND request_type = 'GETMAP'
             AND LOWER(layers) != 'overview'{user_filter}
             GROUP BY project
-            ORDER BY avg_time DESC
+            ORDER BY AVG(response_time_ms) DESC
             LIMIT 10
         ''', [from_date, to_date])
         
-        results = [{'project': row[0], 'avg_time': round(row[1], 1), 'count': row[2]} for row in cursor.fetchall()]
+        results = [{'project': row[0], 'avg_time': row[1], 'count': row[2]} for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching project rankings: {e}")
         return jsonify([]), 500
 
 @app.route('/api/analytics/pool-comparison')
+@conditional_get
+@in_thread_pool
 def get_pool_comparison():
     """Get pool performance comparison"""
     try:
@@ -1588,13 +2199,13 @@ def get_pool_comparison():
         project = request.args.get('project', 'all')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         query = f'''
             SELECT
                 pool,
-                AVG(response_time_ms) as avg_time,
+                ROUND(AVG(response_time_ms), 1) as avg_time,
                 COUNT(*) as count,
                 MIN(response_time_ms) as min_time,
                 MAX(response_time_ms) as max_time
@@ -1611,16 +2222,17 @@ def get_pool_comparison():
         query += ' GROUP BY pool ORDER BY pool'
         
         cursor.execute(query, params)
-        results = [{'pool': row[0], 'avg_time': round(row[1], 1), 'count': row[2], 
+        results = [{'pool': row[0], 'avg_time': row[1], 'count': row[2], 
                    'min_time': row[3], 'max_time': row[4]} for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching pool comparison: {e}")
         return jsonify([]), 500
 
 @app.route('/api/analytics/volume-performance')
+@conditional_get
+@in_thread_pool
 def get_volume_performance():
     """Get correlation between request volume and performance"""
     try:
@@ -1630,16 +2242,16 @@ def get_volume_performance():
         aggregation = request.args.get('aggregation', 'hour')  # hour or day
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         
-        agg_format = '%Y-%m-%d %H:00:00' if aggregation == 'hour' else '%Y-%m-%d'
+        period_sql = PERIOD_SQL['hour'] if aggregation == 'hour' else PERIOD_SQL['day']
         
         query = f'''
             SELECT 
-                strftime('{agg_format}', timestamp) as period,
+                {period_sql} as period,
                 COUNT(*) as volume,
-                AVG(response_time_ms) as avg_time
+                ROUND(AVG(response_time_ms), 1) as avg_time
             FROM requests
             WHERE timestamp >= ? AND timestamp <= ? AND request_type = 'GETMAP'
             AND LOWER(layers) != 'overview'{user_filter}
@@ -1650,18 +2262,20 @@ def get_volume_performance():
             query += ' AND project = ?'
             params.append(project)
         
-        query += f' GROUP BY strftime(\'{agg_format}\', timestamp) ORDER BY period'
+        query += ' GROUP BY period ORDER BY period'
         
         cursor.execute(query, params)
-        results = [{'period': row[0], 'volume': row[1], 'avg_time': round(row[2], 1)} for row in cursor.fetchall()]
+        results = [{'period': row[0], 'volume': row[1], 'avg_time': row[2]} for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching volume performance: {e}")
         return jsonify([]), 500
 
 @app.route('/api/analytics/day-of-week')
+@conditional_get
+@ttl_cached(30)
+@in_thread_pool
 def get_day_of_week_performance():
     """Get performance by day of week"""
     try:
@@ -1670,13 +2284,13 @@ def get_day_of_week_performance():
         project = request.args.get('project', 'all')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         query = f'''
             SELECT
                 CAST(strftime('%w', timestamp) AS INTEGER) as day_num,
-                AVG(response_time_ms) as avg_time,
+                ROUND(AVG(response_time_ms), 1) as avg_time,
                 COUNT(*) as count
             FROM requests
             WHERE timestamp >= ? AND timestamp <= ? AND request_type = 'GETMAP'
@@ -1691,39 +2305,54 @@ def get_day_of_week_performance():
         query += ' GROUP BY day_num ORDER BY day_num'
         
         cursor.execute(query, params)
-        results = [{'day_num': row[0], 'avg_time': round(row[1], 1), 'count': row[2]} for row in cursor.fetchall()]
+        results = [{'day_num': row[0], 'avg_time': row[1], 'count': row[2]} for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching day of week performance: {e}")
         return jsonify([]), 500
 
 @app.route('/api/system/history')
+@in_thread_pool
 def get_system_history():
     """Get system metrics history with optional hourly aggregation for longer timeframes"""
     try:
         hours = int(request.args.get('hours', 24))
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         # For timeframes > 24 hours, aggregate by hour to reduce data points
         if hours > 24:
-            # Aggregate by hour
+            # Completed hours come from the rollup table; only the hours not
+            # rolled up yet are aggregated from the raw samples
             cursor.execute('''
+                SELECT
+                    timestamp,
+                    ROUND(cpu_percent, 1) as cpu_percent,
+                    ROUND(memory_percent, 1) as memory_percent,
+                    ROUND(memory_used_gb, 2) as memory_used_gb,
+                    ROUND(memory_available_gb, 2) as memory_available_gb,
+                    ROUND(memory_total_gb, 2) as memory_total_gb,
+                    COALESCE(ROUND(swap_used_gb, 2), 0) as swap_used_gb,
+                    COALESCE(ROUND(swap_percent, 1), 0) as swap_percent
+                FROM system_metrics_hourly
+                WHERE timestamp >= strftime('%Y-%m-%d %H:00:00', datetime('now', '-' || ?1 || ' hours'))
+                UNION ALL
                 SELECT 
                     strftime('%Y-%m-%d %H:00:00', timestamp) as timestamp,
-                    AVG(cpu_percent) as cpu_percent,
-                    AVG(memory_percent) as memory_percent,
-                    AVG(memory_used_gb) as memory_used_gb,
-                    AVG(memory_available_gb) as memory_available_gb,
-                    MAX(memory_total_gb) as memory_total_gb,
-                    AVG(swap_used_gb) as swap_used_gb,
-                    AVG(swap_percent) as swap_percent
+                    ROUND(AVG(cpu_percent), 1) as cpu_percent,
+                    ROUND(AVG(memory_percent), 1) as memory_percent,
+                    ROUND(AVG(memory_used_gb), 2) as memory_used_gb,
+                    ROUND(AVG(memory_available_gb), 2) as memory_available_gb,
+                    ROUND(MAX(memory_total_gb), 2) as memory_total_gb,
+                    COALESCE(ROUND(AVG(swap_used_gb), 2), 0) as swap_used_gb,
+                    COALESCE(ROUND(AVG(swap_percent), 1), 0) as swap_percent
                 FROM system_metrics
-                WHERE timestamp >= datetime('now', '-' || ? || ' hours')
+                WHERE timestamp >= datetime('now', '-' || ?1 || ' hours')
+                AND timestamp >= COALESCE(
+                    (SELECT datetime(MAX(timestamp), '+1 hour') FROM system_metrics_hourly), '')
                 GROUP BY strftime('%Y-%m-%d %H:00:00', timestamp)
                 ORDER BY timestamp ASC
             ''', [hours])
@@ -1732,34 +2361,21 @@ def get_system_history():
             cursor.execute('''
                 SELECT
                     timestamp,
-                    cpu_percent,
-                    memory_percent,
-                    memory_used_gb,
-                    memory_available_gb,
-                    memory_total_gb,
-                    swap_used_gb,
-                    swap_percent
+                    ROUND(cpu_percent, 1) as cpu_percent,
+                    ROUND(memory_percent, 1) as memory_percent,
+                    ROUND(memory_used_gb, 2) as memory_used_gb,
+                    ROUND(memory_available_gb, 2) as memory_available_gb,
+                    ROUND(memory_total_gb, 2) as memory_total_gb,
+                    COALESCE(ROUND(swap_used_gb, 2), 0) as swap_used_gb,
+                    COALESCE(ROUND(swap_percent, 1), 0) as swap_percent
                 FROM system_metrics
                 WHERE timestamp >= datetime('now', '-' || ? || ' hours')
                 ORDER BY timestamp ASC
             ''', [hours])
         
-        rows = cursor.fetchall()
-        
-        metrics_list = []
-        for row in rows:
-            metrics_list.append({
-                'timestamp': row['timestamp'],
-                'cpu_percent': round(row['cpu_percent'], 1),
-                'memory_percent': round(row['memory_percent'], 1),
-                'memory_used_gb': round(row['memory_used_gb'], 2),
-                'memory_available_gb': round(row['memory_available_gb'], 2),
-                'memory_total_gb': round(row['memory_total_gb'], 2),
-                'swap_used_gb': round(row['swap_used_gb'] or 0, 2),
-                'swap_percent': round(row['swap_percent'] or 0, 1)
-            })
+        # Rounded in the query, so rows go out as they are
+        metrics_list = [dict(row) for row in cursor.fetchall()]
         
-        conn.close()
         return jsonify(metrics_list)
     except Exception as e:
         print(f"Error fetching system history: {e}")
@@ -1783,9 +2399,9 @@ def get_slowest_requests():
         pool = request.args.get('pool', 'all')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         pool_filter = f" AND pool = '{pool}'" if pool and pool != 'all' else ''
         cursor.execute(f'''
@@ -1808,7 +2424,6 @@ def get_slowest_requests():
             'response_time_ms': row['response_time_ms'],
             'request_id':       row['request_id'] or '',
         } for row in cursor.fetchall()]
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching slowest requests: {e}")
@@ -1816,6 +2431,9 @@ def get_slowest_requests():
 
 
 @app.route('/api/analytics/response-distribution')
+@conditional_get
+@ttl_cached(30)
+@in_thread_pool
 def get_response_distribution():
     """Response time histogram: count of requests per time bucket"""
     try:
@@ -1832,7 +2450,7 @@ def get_response_distribution():
             extra += ' AND project = ?'
             params.append(project)
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(f'''
             SELECT
@@ -1854,7 +2472,6 @@ def get_response_distribution():
             ORDER BY MIN(response_time_ms)
         ''', params)
         results = [{'bucket': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching response distribution: {e}")
@@ -1862,6 +2479,8 @@ def get_response_distribution():
 
 
 @app.route('/api/analytics/layer-rankings')
+@conditional_get
+@in_thread_pool
 def get_layer_rankings():
     """Top 10 slowest layers by average response time"""
     try:
@@ -1878,7 +2497,7 @@ def get_layer_rankings():
             extra += ' AND project = ?'
             params.append(project)
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(f'''
             SELECT
@@ -1893,12 +2512,11 @@ def get_layer_rankings():
             AND layers IS NOT NULL AND layers != ''
             {user_filter}{extra}
             GROUP BY layers
-            ORDER BY avg_time DESC
+            ORDER BY AVG(response_time_ms) DESC
             LIMIT 10
         ''', params)
         results = [{'layer': row[0], 'avg_time': row[1], 'max_time': row[2], 'count': row[3]}
                    for row in cursor.fetchall()]
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching layer rankings: {e}")
@@ -1906,6 +2524,8 @@ def get_layer_rankings():
 
 
 @app.route('/api/analytics/ausreisser')
+@conditional_get
+@in_thread_pool
 def get_ausreisser():
     """Requests above a configurable threshold (default 5000ms)"""
     try:
@@ -1923,7 +2543,7 @@ def get_ausreisser():
             extra += ' AND project = ?'
             params.append(project)
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(f'''
             SELECT timestamp, project, user, layers, response_time_ms
@@ -1943,7 +2563,6 @@ def get_ausreisser():
             'layers':           row[3] or '-',
             'response_time_ms': row[4],
         } for row in cursor.fetchall()]
-        conn.close()
         return jsonify(results)
     except Exception as e:
         print(f"Error fetching Ausreißer: {e}")
@@ -1955,6 +2574,7 @@ def get_ausreisser():
 # =============================================================================
 
 @app.route('/api/usage/log')
+@in_thread_pool
 def get_usage_log():
     """Nutzungsprotokoll: filtered entries from usage_log"""
     try:
@@ -1965,9 +2585,9 @@ def get_usage_log():
         pool = request.args.get('pool', 'all')
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_conn()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         if days == 0:
             cutoff = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).strftime('%Y-%m-%d %H:%M:%S')
@@ -1999,7 +2619,6 @@ def get_usage_log():
         query += ' ORDER BY timestamp DESC LIMIT 2000'
         cursor.execute(query, params)
         rows = cursor.fetchall()
-        conn.close()
 
         result = [{
             'id':              row['id'],
@@ -2021,13 +2640,14 @@ def get_usage_log():
 
 
 @app.route('/api/usage/summary')
+@in_thread_pool
 def get_usage_summary():
     """Nutzungsprotokoll: summary – counts per type, top users, top projects, WFS-T, hourly"""
     try:
         days = int(request.args.get('days', 7))
         user_filter = build_user_filter()
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
 
         if days == 0:
@@ -2056,7 +2676,6 @@ def get_usage_summary():
         wfst_summary = [{'action': r[0], 'user': r[1], 'layers': r[2], 'count': r[3]}
                         for r in cursor.fetchall()]
 
-        conn.close()
         return jsonify({
             'by_type':      by_type,
             'wfst_summary': wfst_summary,
@@ -2067,11 +2686,12 @@ def get_usage_summary():
 
 
 @app.route('/api/usage/users')
+@in_thread_pool
 def get_usage_users():
     """Distinct users in usage_log for filter dropdown"""
     try:
         user_filter = build_user_filter()
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute(f'''
             SELECT DISTINCT user FROM usage_log
@@ -2080,7 +2700,6 @@ def get_usage_users():
             ORDER BY user
         ''')
         users = [r[0] for r in cursor.fetchall()]
-        conn.close()
         return jsonify(users)
     except Exception as e:
         print(f"Error fetching usage users: {e}")
@@ -2088,10 +2707,11 @@ def get_usage_users():
 
 
 @app.route('/api/usage/projects')
+@in_thread_pool
 def get_usage_projects():
     """Distinct projects in usage_log for filter dropdown"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT DISTINCT project FROM usage_log
@@ -2099,7 +2719,6 @@ def get_usage_projects():
             ORDER BY project
         ''')
         projects = [r[0] for r in cursor.fetchall()]
-        conn.close()
         return jsonify(projects)
     except Exception as e:
         print(f"Error fetching usage projects: {e}")
@@ -2114,7 +2733,10 @@ def start_background_workers():
     required. (Previously these only started on the first websocket connect, so
     after any restart the tool captured nothing until someone opened the
     dashboard, silently losing every request in between.)"""
-    global monitoring_active, log_monitoring_active, cleanup_active
+    global monitoring_active, log_monitoring_active, cleanup_active, db_writer_active
+    if not db_writer_active:
+        db_writer_active = True
+        socketio.start_background_task(db_writer_thread)
     if not monitoring_active:
         monitoring_active = True
         socketio.start_background_task(monitoring_thread)
@@ -2135,52 +2757,22 @@ def handle_connect():
     # this covers any path where the app is served without reaching __main__.
     start_background_workers()
 
-    # Send initial data immediately
-    metrics = get_system_metrics()
-    processes = get_process_info()
-    emit('metrics_update', {
-        'system': metrics,
-        'processes': processes
-    })
+    # Send initial data immediately, reusing the last broadcast payload. Not
+    # sampled here: cpu_percent(interval=None) measures since the previous
+    # call, so a sample per connect would shorten the monitoring thread's next
+    # interval. Before the first push there is nothing to send yet; that push
+    # follows within METRICS_PUSH_INTERVAL.
+    if latest_metrics_update is not None:
+        emit('metrics_update', latest_metrics_update)
     
-    # Send initial response time stats
-    initial_stats = {}
-    for pool in POOL_NAMES:
-        initial_stats[pool] = {
-            '10min': calculate_response_stats(pool, 600),    # In-memory (fast, recent)
-            '30min': calculate_response_stats(pool, 1800),   # In-memory (fast, recent)
-            '1hour': calculate_response_stats_from_db(pool, 3600),    # Database (accurate)
-            '24hour': calculate_response_stats_from_db(pool, 86400),  # Database (accurate)
-            'errors': log_stats[pool]['errors'],
-            'warnings': log_stats[pool]['warnings'],
-            'total_requests': log_stats[pool]['requests_total']
-        }
-    
-    # Add PHP-FPM stats
-    initial_stats['php-fpm'] = {
-        'errors': log_stats['php-fpm']['errors'],
-        'warnings': log_stats['php-fpm']['warnings']
-    }
-    
-    emit('stats_update', initial_stats)
+    # Send initial response time stats, from the last push when there was one
+    if latest_stats_update is None:
+        emit('stats_update', build_stats_update())
+    else:
+        emit('stats_update', latest_stats_update)
     
     # Send initial slowest requests
-    slowest_update = {}
-    for pool in POOL_NAMES:
-        slowest_update[pool] = [
-            {
-                'response_time': r[0],
-                'timestamp': datetime.fromtimestamp(r[1]).strftime('%H:%M:%S'),
-                'request_id': r[2],
-                'map': r[3]['map'],
-                'user': r[3]['user'],
-                'layers': r[3]['layers'],
-                'request_type': r[3]['request_type']
-            }
-            for r in slowest_requests[pool]
-        ]
-    
-    emit('slowest_requests', slowest_update)
+    emit('slowest_requests', {pool: format_slowest(pool) for pool in POOL_NAMES})
     
     # Send recent issues
     emit('recent_issues', {
@@ -2192,7 +2784,15 @@ def handle_disconnect():
     """Handle client disconnection"""
     print(f"Client disconnected: {datetime.now()}")
 
+def handle_sigterm(signum, frame):
+    """Turn SIGTERM (systemctl stop) into a normal exit so atexit handlers run"""
+    sys.exit(0)
+
 if __name__ == '__main__':
+    # Python's default SIGTERM action ends the process without running atexit
+    # handlers, which would drop the rows still buffered for the writer
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
     print("=" * 60)
     print("QGIS Server Monitoring Dashboard")
     print("=" * 60)
@@ -2205,6 +2805,6 @@ if __name__ == '__main__':
     # Start capture at boot so logging runs continuously, independent of whether
     # a browser is viewing the dashboard.
     start_background_workers()
-    print("Background capture workers started at boot (metrics, log tailing, cleanup)")
+    print("Background capture workers started at boot (metrics, log tailing, DB writer, cleanup)")
 
     socketio.run(app, host=HOST, port=PORT, debug=False)